@@ -1,14 +1,19 @@
 import streamlit as st
 import pandas as pd
+import openpyxl
 from io import BytesIO
 import base64
+import hmac
 import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import corpnorm_utils as utils
 
 # =========================================================
 # 1. Config & Setup
 # =========================================================
 
+@st.cache_resource
 def load_config(path="config.txt"):
     config = {}
     try:
@@ -21,20 +26,58 @@ def load_config(path="config.txt"):
         pass
     return config
 
+@st.cache_resource
 def load_rules(path="rules_corpnorm.txt"):
     try:
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     except: return "You are CorpNorm AI."
 
-CONFIG = load_config()
-RULES = load_rules()
+# Concurrent agent calls per batch; defined in corpnorm_utils, which sizes its verify pool from it
+MAX_WORKERS = utils.MAX_ROW_WORKERS
+
+@st.cache_resource
+def api_key_salt():
+    # Per-process secret, so cache keys never contain a plain hash of an API key
+    return secrets.token_bytes(16)
+
+def api_keys_digest(serpapi_key, openai_key):
+    return hmac.new(api_key_salt(), f"{serpapi_key}\0{openai_key}".encode(), "sha256").hexdigest()
+
+class UncachedResult(Exception):
+    """Raised out of cached_agent_result so a failed lookup is returned but not cached."""
+    def __init__(self, result):
+        super().__init__(result.get("Remark", ""))
+        self.result = result
+
+ERROR_REMARKS = ("AI Error", "SerpAPI Error")
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_agent_result(norm_name, country, street, city, premium, keys_digest, _agent, _raw_name, _address, _serpapi_key="", _openai_key="", _rules=""):
+    """
+    Agent result shared across reruns for one (normalized name, country, mode).
+    Premium mode also keys on street/city (sent to OpenAI) and keys_digest (the API keys).
+    Underscored args (agent, raw input, API keys, rules) are not part of the cache key.
+    """
+    if premium:
+        res = _agent.process_premium(_raw_name, _address, _serpapi_key, _openai_key, _rules)
+        if str(res.get("Remark", "")).startswith(ERROR_REMARKS):
+            raise UncachedResult(res)
+        return res
+    # Free Agent using Hybrid Strategy
+    return _agent.process(_raw_name, _address, norm=norm_name)
 
 # =========================================================
 # 1.5 Logo Loading
 # =========================================================
 
-# (Logo embedding removed — header will be simple text per user request)
+@st.cache_resource
+def load_logo_datauri(name="corpnorm_logo_applied.svg"):
+    p = os.path.join(os.path.dirname(__file__), name)
+    if os.path.exists(p):
+        with open(p, "rb") as f:
+            return "data:image/svg+xml;base64," + base64.b64encode(f.read()).decode()
+    return None
 
 # =========================================================
 # 2. Main Streamlit App
@@ -43,15 +86,12 @@ RULES = load_rules()
 def main():
     st.set_page_config(page_title="CorpNorm AI - Agentic", layout="wide", page_icon="🕵️")
     
+    # Cached once per process; Streamlit reruns main() on every interaction
+    CONFIG = load_config()
+    RULES = load_rules()
+
     # --- Simple Header with Logo ---
-    def _load_logo_datauri(name="corpnorm_logo_applied.svg"):
-        p = os.path.join(os.path.dirname(__file__), name)
-        if os.path.exists(p):
-            with open(p, "rb") as f:
-                return "data:image/svg+xml;base64," + base64.b64encode(f.read()).decode()
-        return None
-
-    logo_uri = _load_logo_datauri()
+    logo_uri = load_logo_datauri()
     col_logo, col_text = st.columns([1, 6])
     with col_logo:
         if logo_uri:
@@ -121,7 +161,13 @@ def main():
         
         if uploaded:
             try:
-                df = pd.read_excel(uploaded)
+                try:
+                    # Rust-based reader; much faster than openpyxl on large sheets
+                    df = pd.read_excel(uploaded, engine="calamine")
+                except (ImportError, ValueError):
+                    # python-calamine missing, or pandas < 2.2 ("Unknown engine")
+                    uploaded.seek(0)
+                    df = pd.read_excel(uploaded)
                 st.dataframe(df.head())
                 df_loaded = True
             except Exception as e:
@@ -135,45 +181,92 @@ def main():
     
     # --- Processing Logic (works for both modes) ---
     if df is not None and df_loaded:
-        results = []
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        total = len(df)
-        
+        # Clean input columns in one vectorized pass (missing columns read as "")
+        input_cols = ("Raw Company Name", "Street Address1", "City Name", "Country Name")
+        for col in input_cols:
+            df[col] = df[col].fillna("").astype(str).str.strip() if col in df else ""
+        df = df[df["Raw Company Name"] != ""]
+
+        # Columns are already clean strings: build the per-row inputs in one go
+        names = df["Raw Company Name"].tolist()
+        addresses = [
+            {"street1": street, "city": city, "country": country}
+            for street, city, country in zip(df["Street Address1"], df["City Name"], df["Country Name"])
+        ]
+
+        total = len(names)
+        use_premium = mode == "Premium (AI+SerpAPI)" and bool(serpapi_key and openai_key)
+
+        # Normalize the whole column once; the agent reuses it instead of re-normalizing
+        norms = df["Raw Company Name"].map(utils.strict_normalize_name).tolist()
+        countries = df["Country Name"].str.upper().tolist()
+
+        # Duplicate companies (same normalized name + country) are looked up once.
+        # In free mode, names that normalize to nothing are answered here and never reach
+        # the workers; premium can still resolve them (e.g. non-Latin names), keyed on the raw name.
+        results = [None] * total
+        rows_by_key = {}
+        for i, (norm, country) in enumerate(zip(norms, countries)):
+            if not norm and not use_premium:
+                results[i] = agent.process(names[i], addresses[i], norm="")
+                continue
+            # Premium answers depend on the full address, free ones only on name + country
+            street, city = (addresses[i]["street1"], addresses[i]["city"]) if use_premium else ("", "")
+            rows_by_key.setdefault((norm or names[i], country, street, city), []).append(i)
+
+        keys_digest = api_keys_digest(serpapi_key, openai_key) if use_premium else ""
+
+        def run_agent(key, i):
+            # Runs on a worker thread: no Streamlit calls in here
+            try:
+                return cached_agent_result(*key, use_premium, keys_digest, agent, names[i], addresses[i], serpapi_key, openai_key, RULES)
+            except UncachedResult as e:
+                return e.result
+
         # Create a localized status container
         with st.status("Agent Working...", expanded=True) as status:
-            for i, row in df.iterrows():
-                raw_name = str(row.get("Raw Company Name", "")).strip()
-                if not raw_name: continue
-                
-                status_text.text(f"Processing {i+1}/{total}: {raw_name}")
-                status.write(f"🔍 Analyzing: **{raw_name}**...")
-                
-                address = {
-                    "street1": str(row.get("Street Address1", "")),
-                    "city": str(row.get("City Name", "")),
-                    "country": str(row.get("Country Name", ""))
-                }
-
-                if mode == "Premium (AI+SerpAPI)":
-                    if not serpapi_key or not openai_key:
-                        status.write("⚠️ Missing Keys! Falling back to Free Agent.")
-                        res = agent.process(raw_name, address)
-                    else:
-                        res = agent.process_premium(raw_name, address, serpapi_key, openai_key, RULES)
-                else:
-                    # Free Agent using Hybrid Strategy
-                    res = agent.process(raw_name, address)
-
-                results.append(res)
-                progress_bar.progress((i + 1) / total)
+            if mode == "Premium (AI+SerpAPI)" and not use_premium:
+                status.write("⚠️ Missing Keys! Falling back to Free Agent.")
+
+            # Rows are I/O-bound (search + page fetches), so fan them out to threads
+            # and report progress from the main thread as each one finishes.
+            # Results are slotted back by row index to keep input order.
+            done = total - sum(len(rows) for rows in rows_by_key.values())
+            # Refresh the UI roughly every 1% of rows; each update is a websocket round-trip
+            step = max(1, total // 100)
+            reported = 0
+            # No `with`: its shutdown(wait=True) would finish every queued row after a
+            # Streamlit stop/rerun interrupts the loop; an abandoned run drops them instead.
+            pool = ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(rows_by_key))))
+            try:
+                futures = {pool.submit(run_agent, key, rows[0]): key for key, rows in rows_by_key.items()}
+                for future in as_completed(futures):
+                    res = future.result()
+                    rows = rows_by_key[futures[future]]
+                    for i in rows:
+                        results[i] = {**res, "Raw Company Name": names[i]}
+                    done += len(rows)
+
+                    if done - reported >= step or done == total:
+                        reported = done
+                        raw_name = names[rows[0]]
+                        status_text.text(f"Processed {done}/{total}: {raw_name}")
+                        status.write(f"🔍 Analyzed: **{raw_name}**")
+                        progress_bar.progress(done / total)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            # Rows answered without a worker (all invalid, or an empty sheet) never hit the loop
+            status_text.text(f"Processed {done}/{total}")
+            progress_bar.progress(done / total if total else 1.0)
             
             status.update(label="Processing Complete!", state="complete", expanded=False)
 
         # --- Output Formatting ---
         st.success("Analysis Complete!")
-        df_out = pd.DataFrame(results)
         
         # Ensure Column Order matches Output.xlsx (Gold Standard)
         desired_order = [
@@ -186,16 +279,21 @@ def main():
             "Confidence Score"
         ]
         
-        # Reindex to enforce order
-        cols = [c for c in desired_order if c in df_out.columns] + [c for c in df_out.columns if c not in desired_order]
-        df_out = df_out[cols]
+        # Fix column order at construction; any unexpected keys go last
+        extras = sorted(set().union(*results) - set(desired_order))
+        df_out = pd.DataFrame.from_records(results, columns=desired_order + extras)
 
         st.dataframe(df_out)
         
         # Download
+        # Write-only workbook streams rows straight to the xlsx (no styles needed)
         buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            df_out.to_excel(writer, index=False)
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(list(df_out.columns))
+        for row in df_out.itertuples(index=False, name=None):
+            ws.append([None if pd.isna(v) else v for v in row])
+        wb.save(buffer)
         buffer.seek(0)
         
         st.download_button(
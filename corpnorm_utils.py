@@ -1,10 +1,20 @@
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
-import difflib
+import threading
+import functools
+import hashlib
+import os
+import diskcache
+from concurrent.futures import ThreadPoolExecutor
 import openai
+import ahocorasick
 from urllib.parse import urlparse, unquote
+from selectolax.lexbor import LexborHTMLParser
+from rapidfuzz import fuzz
 
 # =========================================================
 # 1. Normalization Constants & Logic
@@ -17,20 +27,25 @@ LEGAL_SUFFIXES = [
     " K K", " G K", " SPOL S R O"
 ]
 
+_SUFFIX_TUPLE = tuple(sorted(LEGAL_SUFFIXES, key=len, reverse=True))
+
+_RE_NONALNUM = re.compile(r"[^A-Za-z0-9 ]+")
+_RE_WS = re.compile(r"\s+")
+# One or more trailing legal suffixes, e.g. " PVT LTD" or " CO LTD BRANCH"
+_RE_SUFFIX = re.compile(
+    r"(?:\s+(?:" + "|".join(re.escape(s.strip()) for s in _SUFFIX_TUPLE) + r"))+$"
+)
+
 def strict_normalize_name(text: str) -> str:
     if not isinstance(text, str) or not text:
         return ""
     text = text.replace("&", " AND ")
-    text = re.sub(r"[^A-Za-z0-9 ]+", " ", text)
-    text = re.sub(r"\s+", " ", text)
+    text = _RE_NONALNUM.sub(" ", text)
+    text = _RE_WS.sub(" ", text)
     text = text.strip().upper()
-    changed = True
-    while changed and text:
-        changed = False
-        for suffix in LEGAL_SUFFIXES:
-            if text.endswith(suffix):
-                text = text[: -len(suffix)].rstrip()
-                changed = True
+    # endswith(tuple) is a single C call; most names have no suffix to strip
+    if text.endswith(_SUFFIX_TUPLE):
+        text = _RE_SUFFIX.sub("", text)
     return text
 
 # =========================================================
@@ -50,11 +65,41 @@ THIRD_PARTY_DOMAINS = [
     "kompass.com", "techcrunch.com"
 ]
 
+def _build_automaton(words) -> "ahocorasick.Automaton":
+    """Aho-Corasick automaton mapping each (word, value) pair's word to its value."""
+    ac = ahocorasick.Automaton()
+    for word, value in words:
+        ac.add_word(word, value)
+    ac.make_automaton()
+    return ac
+
+# Both lists in one automaton; blocked entries go last so they win for domains listed twice
+_DOMAIN_AC = _build_automaton(
+    [(d, "Third Party") for d in THIRD_PARTY_DOMAINS] + [(d, "Blocked") for d in BLOCKED_OFFICIAL]
+)
+
+def classify_domain(domain: str) -> str:
+    """'Blocked', 'Third Party' or '' for a domain, matching list entries as substrings."""
+    kinds = {kind for _, kind in _DOMAIN_AC.iter(domain)}
+    if "Blocked" in kinds: return "Blocked"
+    if "Third Party" in kinds: return "Third Party"
+    return ""
+
+# Title/description phrases that mark a parked or for-sale domain
+PARKED_KEYWORDS = ["domain for sale", "buy this domain", "godaddy", "namecheap", "parked"]
+_RE_PARKED = re.compile("|".join(map(re.escape, PARKED_KEYWORDS)))
+
+# Trailing " - Home" / " | Official Site" etc. in page titles
+_RE_TITLE_CLEAN = re.compile(r"\s*[-|]\s*(home|official|welcome|index).*", re.IGNORECASE)
+
+_RE_SCHEME = re.compile(r"^https?://")
+_RE_WWW = re.compile(r"^www\.")
+
 def clean_url(url: str) -> str:
     if not isinstance(url, str): return ""
     u = url.strip()
     if not u or " " in u or "." not in u: return ""
-    if not re.match(r"^https?://", u): u = "https://" + u
+    if not _RE_SCHEME.match(u): u = "https://" + u
     return u
 
 def get_domain(url: str) -> str:
@@ -65,13 +110,37 @@ def get_domain(url: str) -> str:
 # 3. Search Providers (DDG & SerpAPI)
 # =========================================================
 
+# One pooled session for every outbound call so repeated hosts (DDG, SerpAPI)
+# reuse TCP/TLS connections. pool_maxsize must cover MAX_ROW_WORKERS threads.
+# Arbitrary pages (guesses, search results) are never retried. The search APIs
+# retry throttling/gateway statuses with a short backoff, ignoring Retry-After
+# so a server can't park a worker thread for as long as it asks.
+DDG_API_URL = "https://api.duckduckgo.com/"
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+_SESSION = requests.Session()
+_PAGE_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0)
+_API_ADAPTER = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=2, connect=0, read=0, backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504), respect_retry_after_header=False
+    )
+)
+_SESSION.mount("https://", _PAGE_ADAPTER)
+_SESSION.mount("http://", _PAGE_ADAPTER)
+# requests picks the longest matching prefix, so these win for the API hosts
+_SESSION.mount(DDG_API_URL, _API_ADAPTER)
+_SESSION.mount(SERPAPI_URL, _API_ADAPTER)
+
 def duckduckgo_search_api(query: str) -> list:
-    url = "https://api.duckduckgo.com/"
+    url = DDG_API_URL
     params = {"q": query, "format": "json", "no_html": 1, "skip_disambig": 1}
     headers = {"User-Agent": "Mozilla/5.0"}
     urls = []
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+        resp = _SESSION.get(url, params=params, headers=headers, timeout=10)
         data = resp.json()
         if data.get("AbstractURL"): urls.append(data["AbstractURL"])
         for r in data.get("Results", []):
@@ -87,7 +156,7 @@ def serpapi_search(query: str, api_key: str) -> list:
     Simulates Bing result structure but using SerpAPI (Google).
     Returns list of dicts: [{"name": Title, "url": URL, "snippet": Snippet}]
     """
-    url = "https://serpapi.com/search.json"
+    url = SERPAPI_URL
     params = {
         "engine": "google",
         "q": query,
@@ -95,7 +164,7 @@ def serpapi_search(query: str, api_key: str) -> list:
         "num": 5
     }
     try:
-        resp = requests.get(url, params=params, timeout=10)
+        resp = _SESSION.get(url, params=params, timeout=10)
         data = resp.json()
         
         if "error" in data:
@@ -118,11 +187,11 @@ def serpapi_search(query: str, api_key: str) -> list:
 # =========================================================
 
 def fuzzy_match_score(str1: str, str2: str) -> float:
-    return difflib.SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
+    return fuzz.ratio(str1.lower(), str2.lower()) / 100.0
 
 def match_domain_score(url: str, normalized_name: str) -> float:
     domain = get_domain(url)
-    core_domain = re.sub(r"^www\.", "", domain)
+    core_domain = _RE_WWW.sub("", domain)
     core_domain = core_domain.split(".")[0]
     flat_name = normalized_name.replace(" ", "").lower()
     
@@ -136,24 +205,36 @@ def match_domain_score(url: str, normalized_name: str) -> float:
         if len(first_word) > 3 and first_word in core_domain: return 0.7
     return 0.0
 
+# Title / meta / h1 live near the top of the document
+MAX_PAGE_BYTES = 65536
+
 def fetch_page_metadata(url: str) -> dict:
     try:
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-        resp = requests.get(url, headers=headers, timeout=5, verify=False)
-        if resp.status_code != 200: return {"error": f"Status {resp.status_code}"}
+        # Stream and stop after MAX_PAGE_BYTES instead of downloading the whole page
+        with _SESSION.get(url, headers=headers, timeout=5, verify=False, stream=True) as resp:
+            if resp.status_code != 200: return {"error": f"Status {resp.status_code}"}
+            # Lexbor expects text; only trust a charset the server actually declared
+            has_charset = "charset=" in resp.headers.get("Content-Type", "").lower()
+            encoding = resp.encoding if has_charset else "utf-8"
+            chunks = []; size = 0
+            for chunk in resp.iter_content(8192):
+                chunks.append(chunk); size += len(chunk)
+                if size >= MAX_PAGE_BYTES: break
         
-        content = resp.text
-        title_match = re.search(r'<title>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-        title = title_match.group(1).strip() if title_match else ""
-        desc_match = re.search(r'<meta\s+name=["\']description["\']\s+content=["\'](.*?)["\']', content, re.IGNORECASE)
-        description = desc_match.group(1).strip() if desc_match else ""
-        h1_match = re.search(r'<h1[^>]*>(.*?)</h1>', content, re.IGNORECASE | re.DOTALL)
-        h1 = h1_match.group(1).strip() if h1_match else ""
-        h1 = re.sub(r'<[^>]+>', '', h1)
-        body_text = re.sub(r'<script.*?</script>', ' ', content, flags=re.DOTALL | re.IGNORECASE)
-        body_text = re.sub(r'<style.*?</style>', ' ', body_text, flags=re.DOTALL | re.IGNORECASE)
-        body_text = re.sub(r'<[^>]+>', ' ', body_text)
-        body_text = re.sub(r'\s+', ' ', body_text).strip()
+        raw = b"".join(chunks)[:MAX_PAGE_BYTES]
+        try: content = raw.decode(encoding, errors="replace")
+        except LookupError: content = raw.decode("utf-8", errors="replace")
+
+        tree = LexborHTMLParser(content)
+        tree.strip_tags(["script", "style"])
+        title_el = tree.css_first("title")
+        title = title_el.text().strip() if title_el else ""
+        desc_el = tree.css_first('meta[name="description" i]')
+        description = (desc_el.attributes.get("content") or "").strip() if desc_el else ""
+        h1_el = tree.css_first("h1")
+        h1 = h1_el.text().strip() if h1_el else ""
+        body_text = " ".join(tree.root.text(separator=" ").split()) if tree.root else ""
         
         return {"title": title, "description": description, "h1": h1, "body": body_text[:1000]}
     except Exception as e: return {"error": str(e)}
@@ -175,52 +256,110 @@ INDUSTRY_KEYWORDS = [
     ("solution", "Technology Solutions")
 ]
 
+_INDUSTRY_AC = _build_automaton((kw, (i, label)) for i, (kw, label) in enumerate(INDUSTRY_KEYWORDS))
+
 def infer_industry_from_text(text: str) -> str:
     if not text: return ""
-    text = text.lower()
-    for kw, label in INDUSTRY_KEYWORDS:
-        if kw in text: return label
-    return "" 
+    # Single pass over the text; earliest keyword in INDUSTRY_KEYWORDS still wins
+    hit = min((value for _, value in _INDUSTRY_AC.iter(text.lower())), default=None)
+    return hit[1] if hit else ""
 
 # =========================================================
 # 6. The AGENT
 # =========================================================
 
+# Rows processed concurrently by the app (keep <= the HTTP pool size above)
+MAX_ROW_WORKERS = 32
+
+# Search results verified per row; they are fetched concurrently
+MAX_SEARCH_CANDIDATES = 3
+
+# Shared by all agents/rows so search-result fetches overlap without spawning
+# threads per row. Sized so every row worker can fan out at once.
+_VERIFY_POOL = ThreadPoolExecutor(max_workers=MAX_ROW_WORKERS * MAX_SEARCH_CANDIDATES, thread_name_prefix="corpnorm-verify")
+
+# Parsed OpenAI answers, persisted across runs so repeat companies skip the API call
+OPENAI_CACHE_TTL = 7 * 86400
+OPENAI_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".corpnorm_openai_cache")
+
+# Rows run on many worker threads; cap in-flight OpenAI requests to stay under rate limits
+MAX_OPENAI_CONCURRENCY = 20
+_OPENAI_SLOTS = threading.BoundedSemaphore(MAX_OPENAI_CONCURRENCY)
+
+# Free-pipeline confidence at which premium mode trusts the result without AI
+PREMIUM_FAST_PATH_SCORE = 0.9
+
+@functools.lru_cache(maxsize=None)
+def _openai_cache():
+    """Opened on first AI call; None (no caching) if the directory isn't writable."""
+    try:
+        return diskcache.Cache(OPENAI_CACHE_DIR)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _openai_client(api_key: str) -> "openai.OpenAI":
+    """One thread-safe client (and connection pool) per API key."""
+    return openai.OpenAI(api_key=api_key)
+
 class CompanyAgent:
+    def __init__(self):
+        # (domain, normalized name) -> verify_candidate result, kept for the agent's lifetime
+        self._verify_cache = {}
+
+    def verify_candidates(self, urls: list, normalized_name: str) -> list:
+        """Runs verify_candidate on all urls concurrently; results keep the order of urls."""
+        return list(_VERIFY_POOL.map(lambda url: self.verify_candidate(url, normalized_name), urls))
+
     def verify_candidate(self, url: str, normalized_name: str) -> dict:
+        """Memoized by (domain, normalized name): repeat hits skip the page fetch."""
+        key = (get_domain(clean_url(url)), normalized_name)
+        res = self._verify_cache.get(key)
+        if res is None:
+            res = self._verify_candidate(url, normalized_name)
+            self._verify_cache[key] = res
+        return res
+
+    def _verify_candidate(self, url: str, normalized_name: str) -> dict:
         url = clean_url(url)
         if not url: return {"score": 0, "industry": "", "reason": "Bad URL"}
 
         domain = get_domain(url)
-        if any(b in domain for b in BLOCKED_OFFICIAL): return {"score": 0.1, "industry": "", "reason": "Blocked"}
-        if any(tp in domain for tp in THIRD_PARTY_DOMAINS): return {"score": 0.2, "industry": "", "reason": "Third Party"}
+        kind = classify_domain(domain)
+        if kind == "Blocked": return {"score": 0.1, "industry": "", "reason": "Blocked"}
+        if kind == "Third Party": return {"score": 0.2, "industry": "", "reason": "Third Party"}
 
         domain_score = match_domain_score(url, normalized_name)
         meta = fetch_page_metadata(url)
         title = meta.get("title", "")
         
         blob_lower = (title + " " + meta.get("description", "")).lower()
-        parked_keywords = ["domain for sale", "buy this domain", "godaddy", "namecheap", "parked"]
-        if any(pk in blob_lower for pk in parked_keywords): return {"score": 0, "industry": "", "reason": "Parked"}
+        if _RE_PARKED.search(blob_lower): return {"score": 0, "industry": "", "reason": "Parked"}
 
         title_score = 0
-        if "error" not in meta:
-             clean_title = re.sub(r"(?i)\s*[-|]\s*(home|official|welcome|index).*", "", title)
+        # An exact domain match already pins the score at 1.0, so the title can't change it
+        if "error" not in meta and domain_score < 1.0:
+             clean_title = _RE_TITLE_CLEAN.sub("", title)
              title_score = fuzzy_match_score(normalized_name, clean_title)
 
         final_score = max(domain_score, title_score)
         if domain_score > 0.7 and "error" not in meta: final_score = max(final_score, 0.9)
         elif domain_score > 0.4 and title_score > 0.4: final_score = max(final_score, 0.8)
 
-        blob = f"{title} {meta.get('description', '')} {meta.get('h1', '')} {meta.get('body', '')}"
-        industry = infer_industry_from_text(blob)
-        if not industry and final_score > 0.6: industry = "Unclassified (Website Found)"
+        # Industry is only reported alongside a website, which process() needs >= 0.5 for
+        industry = ""
+        if final_score >= 0.5:
+            blob = f"{title} {meta.get('description', '')} {meta.get('h1', '')} {meta.get('body', '')}"
+            industry = infer_industry_from_text(blob)
+            if not industry and final_score > 0.6: industry = "Unclassified (Website Found)"
         
-        return {"score": final_score, "industry": industry, "reason": f"S:{final_score:.2f} (D:{domain_score:.1f})"}
+        # The score alone can't tell a live site from an unreachable exact-match guess
+        verified = "error" not in meta and (domain_score > 0.7 or title_score > 0.4)
+        
+        return {"score": final_score, "industry": industry, "reason": f"S:{final_score:.2f} (D:{domain_score:.1f})", "verified": verified}
 
     def ask_openai(self, raw_name: str, address: dict, search_results: dict, rules: str, openai_key: str) -> dict:
         """Calls OpenAI for smart enrichment."""
-        openai.api_key = openai_key
         # Note: We replaced 'bing_results' with 'search_results' to be generic
         messages = [
             {"role": "system", "content": rules},
@@ -233,17 +372,29 @@ class CompanyAgent:
                 })
             }
         ]
+        # Keyed on the normalized name so spelling variants of one company share an answer;
+        # names with no Latin letters normalize to "" and fall back to the raw name
+        cache_key = hashlib.sha1(
+            ((strict_normalize_name(raw_name) or raw_name.strip()) + json.dumps(address, sort_keys=True) + rules).encode()
+        ).hexdigest()
+        cache = _openai_cache()
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                temperature=0
-            )
-            data = json.loads(response["choices"][0]["message"]["content"])
+            data = cache.get(cache_key) if cache is not None else None
+            fresh = data is None
+            if fresh:
+                with _OPENAI_SLOTS:
+                    response = _openai_client(openai_key).chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=messages,
+                        temperature=0
+                    )
+                data = json.loads(response.choices[0].message.content)
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
             data.setdefault("website", "")
             data.setdefault("industry", "")
             data.setdefault("remark", "Verified by OpenAI")
-            return {
+            res = {
                 "Normalized Company Name": strict_normalize_name(data.get("normalized_name", raw_name)),
                 "Website": data["website"],
                 "Industry": data["industry"],
@@ -251,6 +402,10 @@ class CompanyAgent:
                 "Remark": data["remark"],
                 "Confidence Score": "High (AI)"
             }
+            # Only a usable answer is cached; one given without search results isn't worth keeping for a week
+            if fresh and cache is not None and not (isinstance(search_results, dict) and "error" in search_results):
+                cache.set(cache_key, data, expire=OPENAI_CACHE_TTL)
+            return res
         except Exception as e:
             # Fallback output
             return {
@@ -260,7 +415,13 @@ class CompanyAgent:
             }
 
     def process_premium(self, raw_name: str, address: dict, serpapi_key: str, openai_key: str, rules: str) -> dict:
-        """Premium Pipeline: SerpAPI (Google) -> OpenAI"""
+        """Premium Pipeline: Free Agent fast path -> SerpAPI (Google) -> OpenAI"""
+        # 0. Easy rows: a confident free-pipeline hit on a page that actually loaded
+        #    skips the paid SerpAPI + OpenAI calls
+        free_res, verified = self._process_free(raw_name, address)
+        if verified and float(free_res.get("Confidence Score", 0)) >= PREMIUM_FAST_PATH_SCORE:
+            return {**free_res, "Remark": "Verified (fast path, no AI)"}
+
         # 1. SerpAPI Search
         search_data = serpapi_search(raw_name, serpapi_key)
         
@@ -276,30 +437,38 @@ class CompanyAgent:
             "Remark": ai_res.get("Remark", ""),
             "Confidence Score": ai_res.get("Confidence Score", "")
         }
+        if isinstance(search_data, dict) and "error" in search_data:
+            res["Remark"] = f"SerpAPI Error: {search_data['error']}. {res['Remark']}"
         return res
 
-    def process(self, raw_name: str, address: dict) -> dict:
-        """Free Pipeline: Guess -> Verify -> DDG API"""
-        norm = strict_normalize_name(raw_name)
-        if not norm: return {"Raw Company Name": raw_name, "Remark": "Invalid"}
+    def process(self, raw_name: str, address: dict, norm: str = None) -> dict:
+        """Free Pipeline: Guess -> Verify -> DDG API. norm: precomputed strict_normalize_name(raw_name)."""
+        return self._process_free(raw_name, address, norm)[0]
+
+    def _process_free(self, raw_name: str, address: dict, norm: str = None) -> tuple:
+        """process(), plus whether the chosen candidate's page loaded and passed a title/domain check."""
+        if norm is None: norm = strict_normalize_name(raw_name)
+        if not norm: return {"Raw Company Name": raw_name, "Remark": "Invalid"}, False
 
-        best_score = 0; best_cand = ""; best_ind = ""; best_reason = ""
+        best_score = 0; best_cand = ""; best_ind = ""; best_reason = ""; best_verified = False
         
         # Guessing
         guess_domain = norm.replace(" ", "").lower()
-        guesses = [f"https://www.{guess_domain}.com", f"https://{guess_domain}.com"]
-        for guess in guesses:
+        # Sequential on purpose: the first guess usually settles it, the second
+        # only matters when the first is blocked, third-party or parked
+        for guess in [f"https://www.{guess_domain}.com", f"https://{guess_domain}.com"]:
             res = self.verify_candidate(guess, norm)
             if res["score"] > 0.7: 
-                best_score = res["score"]; best_cand = guess; best_ind = res["industry"]; best_reason = "Domain Guess"; break 
+                best_score = res["score"]; best_cand = guess; best_ind = res["industry"]; best_reason = "Domain Guess"
+                best_verified = res.get("verified", False); break 
 
         # API Fallback
         if best_score < 0.7:
-            urls = duckduckgo_search_api(norm)
-            for url in urls[:3]:
-                res = self.verify_candidate(url, norm)
+            urls = duckduckgo_search_api(norm)[:MAX_SEARCH_CANDIDATES]
+            for url, res in zip(urls, self.verify_candidates(urls, norm)):
                 if res["score"] > best_score:
                     best_score = res["score"]; best_cand = url; best_ind = res["industry"]; best_reason = "API Match"
+                    best_verified = res.get("verified", False)
         
         official = best_cand if best_score >= 0.5 else ""
         remark = f"Verified Official ({best_reason})." if official else "Official site not found."
@@ -312,4 +481,4 @@ class CompanyAgent:
             "Third Party Data Source Link": "",
             "Remark": remark,
             "Confidence Score": f"{best_score:.2f}"
-        }
+        }, best_verified and bool(official)
@@ -1,7 +1,6 @@
 
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 
 
 # ---------------------------------------------------------
@@ -19,6 +18,120 @@ thin_border = Border(
     bottom=Side(style="thin")
 )
 
+# Shared style objects (reused for every header cell instead of rebuilt per cell)
+header_fills = {
+    DEEP_BLUE: PatternFill("solid", fgColor=DEEP_BLUE),
+    TEAL: PatternFill("solid", fgColor=TEAL),
+    SOFT_YELLOW: PatternFill("solid", fgColor=SOFT_YELLOW),
+}
+header_font_white = Font(color="FFFFFF", bold=True)
+header_font_black = Font(color="000000", bold=True)
+header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+# Main sheet column widths, by column letter
+COLUMN_WIDTHS = {
+    "A": 40,  # Raw Company Name
+    "B": 40,  # Normalized Company Name
+    "C": 30,  # Website
+    "D": 25,  # Industry
+    "E": 40,  # Third Party Data Source Link
+    "F": 35,  # Remark
+    "G": 18,  # Search – Website
+    "H": 18,  # Search – Industry
+    "I": 22,  # Search – Profile / Registry
+    "J": 30   # All Searches (if present)
+}
+
+
+# ---------------------------------------------------------
+# Search formula templates
+# ---------------------------------------------------------
+HYPERLINK_TEMPLATE = 'HYPERLINK("https://www.google.com/search?q=" & ENCODEURL($B{row} & " {query}"), "{label}")'
+
+# (search query suffix, label in its own column, label in the combined column)
+SEARCHES = [
+    ("official website", "Search Website", "Website"),
+    ("industry", "Search Industry", "Industry"),
+    ("company profile registry", "Search Profile", "Registry"),
+]
+
+
+# ---------------------------------------------------------
+# Usage Guide text
+# ---------------------------------------------------------
+USAGE_GUIDE_HEADER = (
+    "CorpNorm AI – By Kishor",
+    "",
+    "Usage Guide for Excel Template",
+    "================================",
+    "",
+)
+
+# Template-specific section, keyed by template_type
+USAGE_GUIDE_TYPE_LINES = {
+    "blank": (
+        "Template Type: BLANK TEMPLATE",
+        "",
+        "Purpose:",
+        "- This template is meant to be used with CorpNorm AI output.",
+        "- It contains headers, formatting, and search formulas in row 5.",
+    ),
+    "sample": (
+        "Template Type: TEMPLATE + SAMPLE ROW",
+        "",
+        "Purpose:",
+        "- This template shows one example row of CorpNorm AI output.",
+        "- Use it to understand how data and search formulas work together.",
+    ),
+    "full": (
+        "Template Type: FULL WORKFLOW TEMPLATE",
+        "",
+        "Purpose:",
+        "- This template is designed for the full CorpNorm AI workflow.",
+        "- It includes combined search links and a short quick-start guide.",
+    ),
+}
+
+USAGE_GUIDE_BODY = (
+    "",
+    "Columns Overview (Main Sheet):",
+    "- Column A: Raw Company Name",
+    "- Column B: Normalized Company Name",
+    "- Column C: Website",
+    "- Column D: Industry",
+    "- Column E: Third Party Data Source Link",
+    "- Column F: Remark",
+    "- Column G: Search – Website (Google search link)",
+    "- Column H: Search – Industry (Google search link)",
+    "- Column I: Search – Profile / Registry (Google search link)",
+    "- Column J: All Searches (combined) – only in Full template",
+    "",
+    "How to Use with CorpNorm AI Output:",
+    "1) Run the CorpNorm AI Streamlit app and download CorpNorm_Output.xlsx.",
+    "2) Open this template in Excel.",
+    "3) Copy data from CorpNorm_Output.xlsx and paste into columns A–F of the",
+    "   main sheet (starting at row 5).",
+    "4) Ensure the search formulas in row 5 (columns G–I, and J if present)",
+    "   are filled correctly. Then drag/copy them down to all rows with data.",
+    "5) Click the search links to quickly identify:",
+    "   - Official websites",
+    "   - Industry descriptions",
+    "   - Third-party / registry profiles (LEI, Taiwantrade, D&B, etc.)",
+    "",
+    "Tips:",
+    "- Always verify websites and profiles before finalizing your dataset.",
+    "- Prefer official global corporate sites over distributors or social media.",
+    "- If no official website exists, use a trusted registry or profile link.",
+    "- Keep industries short and consistent (1–4 words, e.g., 'ELECTRONIC COMPONENTS').",
+    "",
+    "Branding:",
+    "- The main sheet title is: 'CorpNorm AI – By Kishor'.",
+    "- You can insert an official logo image above or near this title if you wish.",
+    "",
+    "Version:",
+    "- CorpNorm Excel Template v1.0",
+)
+
 
 def setup_common_layout(ws, include_combined_column=False, title_note=None):
     """
@@ -71,26 +184,13 @@ def setup_common_layout(ws, include_combined_column=False, title_note=None):
         else:
             fill_color = SOFT_YELLOW
 
-        cell.fill = PatternFill("solid", fgColor=fill_color)
-        cell.font = Font(color="FFFFFF" if col_idx <= 9 else "000000", bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        cell.fill = header_fills[fill_color]
+        cell.font = header_font_white if col_idx <= 9 else header_font_black
+        cell.alignment = header_alignment
         cell.border = thin_border
 
     # 4) Column widths
-    widths = {
-        1: 40,  # Raw Company Name
-        2: 40,  # Normalized Company Name
-        3: 30,  # Website
-        4: 25,  # Industry
-        5: 40,  # Third Party Data Source Link
-        6: 35,  # Remark
-        7: 18,  # Search – Website
-        8: 18,  # Search – Industry
-        9: 22,  # Search – Profile / Registry
-        10: 30  # All Searches (if present)
-    }
-    for col_idx, width in widths.items():
-        col_letter = get_column_letter(col_idx)
+    for col_letter, width in COLUMN_WIDTHS.items():
         ws.column_dimensions[col_letter].width = width
 
     # 5) Freeze panes (keep title + header visible)
@@ -102,35 +202,16 @@ def add_formulas_in_row(ws, row: int, include_combined_column=False):
     """
     Add search formulas in columns G, H, I (and J if needed) for the given row.
     """
-    row_str = str(row)
-    # G: Search – Website
-    ws[f"G{row_str}"] = (
-        '=HYPERLINK("https://www.google.com/search?q=" & '
-        f'ENCODEURL($B{row_str} & " official website"), "Search Website")'
-    )
-    # H: Search – Industry
-    ws[f"H{row_str}"] = (
-        '=HYPERLINK("https://www.google.com/search?q=" & '
-        f'ENCODEURL($B{row_str} & " industry"), "Search Industry")'
-    )
-    # I: Search – Profile / Registry
-    ws[f"I{row_str}"] = (
-        '=HYPERLINK("https://www.google.com/search?q=" & '
-        f'ENCODEURL($B{row_str} & " company profile registry"), "Search Profile")'
-    )
+    # G, H, I: Search – Website / Industry / Profile / Registry
+    for col_idx, (query, label, _) in enumerate(SEARCHES, start=7):
+        ws.cell(row=row, column=col_idx, value="=" + HYPERLINK_TEMPLATE.format(row=row, query=query, label=label))
 
     if include_combined_column:
         # J: All Searches (combined)
-        ws[f"J{row_str}"] = (
-            '=HYPERLINK("https://www.google.com/search?q=" & '
-            f'ENCODEURL($B{row_str} & " official website"), "Website")'
-            ' & " | " & '
-            'HYPERLINK("https://www.google.com/search?q=" & '
-            f'ENCODEURL($B{row_str} & " industry"), "Industry")'
-            ' & " | " & '
-            'HYPERLINK("https://www.google.com/search?q=" & '
-            f'ENCODEURL($B{row_str} & " company profile registry"), "Registry")'
-        )
+        ws.cell(row=row, column=10, value="=" + ' & " | " & '.join(
+            HYPERLINK_TEMPLATE.format(row=row, query=query, label=short_label)
+            for query, _, short_label in SEARCHES
+        ))
 
 
 def add_usage_guide_sheet(wb, template_type: str):
@@ -141,77 +222,11 @@ def add_usage_guide_sheet(wb, template_type: str):
     """
     ws_guide = wb.create_sheet(title="Usage Guide")
 
-    lines = []
-
-    # Common header
-    lines.append("CorpNorm AI – By Kishor")
-    lines.append("")
-    lines.append("Usage Guide for Excel Template")
-    lines.append("================================")
-    lines.append("")
-
-    if template_type == "blank":
-        lines.append("Template Type: BLANK TEMPLATE")
-        lines.append("")
-        lines.append("Purpose:")
-        lines.append("- This template is meant to be used with CorpNorm AI output.")
-        lines.append("- It contains headers, formatting, and search formulas in row 5.")
-    elif template_type == "sample":
-        lines.append("Template Type: TEMPLATE + SAMPLE ROW")
-        lines.append("")
-        lines.append("Purpose:")
-        lines.append("- This template shows one example row of CorpNorm AI output.")
-        lines.append("- Use it to understand how data and search formulas work together.")
-    elif template_type == "full":
-        lines.append("Template Type: FULL WORKFLOW TEMPLATE")
-        lines.append("")
-        lines.append("Purpose:")
-        lines.append("- This template is designed for the full CorpNorm AI workflow.")
-        lines.append("- It includes combined search links and a short quick-start guide.")
-
-    lines.append("")
-    lines.append("Columns Overview (Main Sheet):")
-    lines.append("- Column A: Raw Company Name")
-    lines.append("- Column B: Normalized Company Name")
-    lines.append("- Column C: Website")
-    lines.append("- Column D: Industry")
-    lines.append("- Column E: Third Party Data Source Link")
-    lines.append("- Column F: Remark")
-    lines.append("- Column G: Search – Website (Google search link)")
-    lines.append("- Column H: Search – Industry (Google search link)")
-    lines.append("- Column I: Search – Profile / Registry (Google search link)")
-    lines.append("- Column J: All Searches (combined) – only in Full template")
-    lines.append("")
-    lines.append("How to Use with CorpNorm AI Output:")
-    lines.append("1) Run the CorpNorm AI Streamlit app and download CorpNorm_Output.xlsx.")
-    lines.append("2) Open this template in Excel.")
-    lines.append("3) Copy data from CorpNorm_Output.xlsx and paste into columns A–F of the")
-    lines.append("   main sheet (starting at row 5).")
-    lines.append("4) Ensure the search formulas in row 5 (columns G–I, and J if present)")
-    lines.append("   are filled correctly. Then drag/copy them down to all rows with data.")
-    lines.append("5) Click the search links to quickly identify:")
-    lines.append("   - Official websites")
-    lines.append("   - Industry descriptions")
-    lines.append("   - Third-party / registry profiles (LEI, Taiwantrade, D&B, etc.)")
-    lines.append("")
-    lines.append("Tips:")
-    lines.append("- Always verify websites and profiles before finalizing your dataset.")
-    lines.append("- Prefer official global corporate sites over distributors or social media.")
-    lines.append("- If no official website exists, use a trusted registry or profile link.")
-    lines.append("- Keep industries short and consistent (1–4 words, e.g., 'ELECTRONIC COMPONENTS').")
-    lines.append("")
-    lines.append("Branding:")
-    lines.append("- The main sheet title is: 'CorpNorm AI – By Kishor'.")
-    lines.append("- You can insert an official logo image above or near this title if you wish.")
-    lines.append("")
-    lines.append("Version:")
-    lines.append("- CorpNorm Excel Template v1.0")
-
-    # Write lines to the sheet
-    row_idx = 1
+    lines = USAGE_GUIDE_HEADER + USAGE_GUIDE_TYPE_LINES.get(template_type, ()) + USAGE_GUIDE_BODY
+
+    # Write lines to the sheet (one row each, starting at A1)
     for line in lines:
-        ws_guide.cell(row=row_idx, column=1, value=line)
-        row_idx += 1
+        ws_guide.append([line])
 
     # Optional: set column width
     ws_guide.column_dimensions["A"].width = 110
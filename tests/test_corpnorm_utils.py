@@ -0,0 +1,69 @@
+from unittest import mock
+
+import pytest
+
+import corpnorm_utils as utils
+
+RAW_NAME = "Zqxv Nonexistent Widget Holdings Pvt Ltd"
+AI_RESULT = {"Raw Company Name": RAW_NAME, "Remark": "AI Analysis", "Confidence Score": "0.40"}
+
+
+def _run_premium(page_meta):
+    with mock.patch.object(utils, "fetch_page_metadata", return_value=page_meta), \
+         mock.patch.object(utils, "duckduckgo_search_api", return_value=[]), \
+         mock.patch.object(utils, "serpapi_search", return_value={"organic_results": []}) as serp, \
+         mock.patch.object(utils.CompanyAgent, "ask_openai", return_value=AI_RESULT) as ai:
+        res = utils.CompanyAgent().process_premium(RAW_NAME, {}, "serp-key", "openai-key", "")
+    return res, serp, ai
+
+
+def test_premium_skips_fast_path_when_every_fetch_fails():
+    res, serp, ai = _run_premium({"error": "DNS failure"})
+    assert serp.call_count == 1
+    assert ai.call_count == 1
+    assert res["Remark"] != "Verified (fast path, no AI)"
+
+
+def test_premium_takes_fast_path_when_page_loads():
+    res, serp, ai = _run_premium({"title": "Zqxv Nonexistent Widget Holdings", "description": ""})
+    assert serp.call_count == 0
+    assert ai.call_count == 0
+    assert res["Remark"] == "Verified (fast path, no AI)"
+
+
+def test_openai_cache_keeps_non_latin_names_apart(tmp_path):
+    answers = iter(['{"normalized_name": "SONY GROUP"}', '{"normalized_name": "TOYOTA MOTOR"}'])
+    client = mock.MagicMock()
+    client.chat.completions.create.side_effect = lambda **kw: mock.Mock(
+        choices=[mock.Mock(message=mock.Mock(content=next(answers)))])
+    with utils.diskcache.Cache(str(tmp_path)) as cache, \
+         mock.patch.object(utils, "_openai_cache", return_value=cache), \
+         mock.patch.object(utils, "_openai_client", return_value=client):
+        agent = utils.CompanyAgent()
+        sony = agent.ask_openai("ソニーグループ株式会社", {"country": "Japan"}, [], "", "openai-key")
+        toyota = agent.ask_openai("トヨタ自動車株式会社", {"country": "Japan"}, [], "", "openai-key")
+    assert client.chat.completions.create.call_count == 2
+    assert sony["Normalized Company Name"] == "SONY GROUP"
+    assert toyota["Normalized Company Name"] == "TOYOTA MOTOR"
+
+
+def test_openai_cache_skips_non_object_answers(tmp_path):
+    client = mock.MagicMock()
+    client.chat.completions.create.return_value = mock.Mock(
+        choices=[mock.Mock(message=mock.Mock(content='["ACME"]'))])
+    with utils.diskcache.Cache(str(tmp_path)) as cache, \
+         mock.patch.object(utils, "_openai_cache", return_value=cache), \
+         mock.patch.object(utils, "_openai_client", return_value=client):
+        agent = utils.CompanyAgent()
+        first = agent.ask_openai("Acme Corp", {}, [], "", "openai-key")
+        second = agent.ask_openai("Acme Corp", {}, [], "", "openai-key")
+        assert len(cache) == 0
+    assert client.chat.completions.create.call_count == 2
+    assert first["Remark"].startswith("AI Error")
+    assert second["Remark"].startswith("AI Error")
+
+
+def test_fuzzy_match_score_uses_indel_ratio():
+    # difflib's greedy SequenceMatcher scored this pair 0.289; RapidFuzz's LCS-based ratio is higher
+    score = utils.fuzzy_match_score("TATA CONSULTANCY SERVICES", "TCS: IT Services, Consulting and Business Solutions")
+    assert score == pytest.approx(0.447, abs=1e-3)